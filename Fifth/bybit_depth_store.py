@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+
+from bybit_orderbook_ws import BybitWebSocket
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+
+# Longest stretch a book is carried forward into buckets without updates
+MAX_FILL_MS = 600_000
+
+
+class OrderBook:
+    """Local order book maintained from Bybit orderbook snapshot/delta messages"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bids = {}
+        self.asks = {}
+        self.update_id = None
+
+    def apply(self, message):
+        """Apply a snapshot or delta message; returns False if the book is not usable yet"""
+        book = message["data"]
+        if message.get("type") == "snapshot":
+            self.bids = {float(p): float(s) for p, s in book.get("b", [])}
+            self.asks = {float(p): float(s) for p, s in book.get("a", [])}
+        elif self.update_id is None:
+            return False  # wait for the first snapshot
+        else:
+            for side, levels in ((self.bids, book.get("b", [])), (self.asks, book.get("a", []))):
+                for p, s in levels:
+                    if float(s) == 0:
+                        side.pop(float(p), None)
+                    else:
+                        side[float(p)] = float(s)
+        self.update_id = book.get("u", 0)
+        return True
+
+    def mid(self):
+        if not self.bids or not self.asks:
+            return None
+        return (max(self.bids) + min(self.asks)) / 2
+
+
+class DepthHeatmapStore:
+    """
+    Buckets an order book into fixed price bands relative to mid and fixed time
+    intervals, stored as one memory-mapped .npy file per symbol and UTC day.
+
+    Each row is a time bucket holding the book as it was at the end of that
+    bucket: columns 0..n_bands-1 are bid size per band (furthest from mid
+    first), columns n_bands..2*n_bands-1 ask size per band (nearest first).
+    A parallel *_mid.npy holds the mid price per bucket, 0 where nothing was
+    recorded. Files are preallocated, so storage per symbol-day is bounded.
+
+    Bybit only pushes the book when it changes, so buckets without an update
+    hold the last book, carried forward for at most max_fill_ms. Buckets stay
+    empty only before the first snapshot and across disconnects.
+    """
+
+    def __init__(self, directory, symbol, bucket_ms=1000, band_bps=1.0, n_bands=50, max_fill_ms=MAX_FILL_MS):
+        if bucket_ms <= 0 or DAY_MS % bucket_ms:
+            raise ValueError(f"bucket_ms must divide a day ({DAY_MS} ms) evenly, got {bucket_ms}")
+        self.directory = directory
+        self.symbol = symbol
+        self.bucket_ms = bucket_ms
+        self.band_bps = band_bps
+        self.n_bands = n_bands
+        self.max_fill_ms = max_fill_ms
+        self.rows_per_day = DAY_MS // bucket_ms
+        self.day = None
+        self.depth = None
+        self.mids = None
+        self.current = None  # start (ms) of the bucket being observed
+        os.makedirs(directory, exist_ok=True)
+        self.write_meta()
+
+    def write_meta(self):
+        """Record the band/bucket layout so readers can interpret the arrays"""
+        path = os.path.join(self.directory, f"{self.symbol}_{self.bucket_ms}ms_meta.json")
+        meta = {"symbol": self.symbol, "bucket_ms": self.bucket_ms, "band_bps": self.band_bps, "n_bands": self.n_bands}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                existing = json.load(f)
+            if existing != meta:
+                raise ValueError(f"{path} was written with a different layout: {existing}")
+            return
+        with open(path, "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def open_day(self, day):
+        """Open (or create) the memory-mapped arrays for one UTC day"""
+        self.flush()
+        depth_path, mid_path = day_paths(self.directory, self.symbol, self.bucket_ms, day)
+        if os.path.exists(depth_path):
+            self.depth = np.load(depth_path, mmap_mode="r+")
+            self.mids = np.load(mid_path, mmap_mode="r+")
+        else:
+            self.depth = np.lib.format.open_memmap(depth_path, mode="w+", dtype=np.float32,
+                                                   shape=(self.rows_per_day, 2 * self.n_bands))
+            self.mids = np.lib.format.open_memmap(mid_path, mode="w+", dtype=np.float64, shape=(self.rows_per_day,))
+        self.day = day
+
+    def bucket_book(self, book):
+        """Sum book sizes into price bands around mid; levels beyond the last band are ignored"""
+        mid = book.mid()
+        if mid is None:
+            return None, None
+
+        row = np.zeros(2 * self.n_bands, dtype=np.float32)
+        band_width = mid * self.band_bps / 10_000
+
+        bid_prices = np.fromiter(book.bids.keys(), dtype=np.float64, count=len(book.bids))
+        bid_sizes = np.fromiter(book.bids.values(), dtype=np.float64, count=len(book.bids))
+        bands = ((mid - bid_prices) // band_width).astype(np.int64)
+        keep = (bands >= 0) & (bands < self.n_bands)
+        np.add.at(row, self.n_bands - 1 - bands[keep], bid_sizes[keep])
+
+        ask_prices = np.fromiter(book.asks.keys(), dtype=np.float64, count=len(book.asks))
+        ask_sizes = np.fromiter(book.asks.values(), dtype=np.float64, count=len(book.asks))
+        bands = ((ask_prices - mid) // band_width).astype(np.int64)
+        keep = (bands >= 0) & (bands < self.n_bands)
+        np.add.at(row, self.n_bands + bands[keep], ask_sizes[keep])
+
+        return mid, row
+
+    def record(self, ts_ms, book):
+        """
+        Call before applying an update stamped ts_ms. When ts_ms starts a new
+        bucket, the book as it stands is the final state of the previous bucket
+        and of every bucket skipped since, and is written to all of them; so
+        the book is bucketed once per update gap, not per update.
+        """
+        bucket = ts_ms - ts_ms % self.bucket_ms
+        if self.current is not None and bucket > self.current:
+            self.write_current(book, until=bucket)
+        if self.current is None or bucket > self.current:
+            self.current = bucket
+
+    def write_current(self, book, until=None):
+        """Write the book into the current bucket and carry it forward up to `until` (exclusive)"""
+        mid, row = self.bucket_book(book)
+        if mid is None:
+            return
+        end = self.current + self.bucket_ms
+        if until is not None:
+            max_fill = max(self.max_fill_ms // self.bucket_ms, 1) * self.bucket_ms
+            end = max(end, min(until, self.current + max_fill))
+        self.write_buckets(self.current, end, mid, row)
+
+    def write_buckets(self, start, end, mid, row):
+        """Write the same row and mid into every bucket in [start, end), one UTC day at a time"""
+        while start < end:
+            day = start // DAY_MS
+            if day != self.day:
+                self.open_day(day)
+            stop = min(end, (day + 1) * DAY_MS)
+            lo = (start % DAY_MS) // self.bucket_ms
+            hi = lo + (stop - start) // self.bucket_ms
+            self.depth[lo:hi] = row
+            self.mids[lo:hi] = mid
+            start = stop
+
+    def flush(self):
+        if self.depth is not None:
+            self.depth.flush()
+            self.mids.flush()
+
+    def close(self, book=None):
+        if book is not None and self.current is not None:
+            self.write_current(book)
+        self.current = None
+        self.flush()
+        self.depth = self.mids = self.day = None
+
+
+def day_paths(directory, symbol, bucket_ms, day):
+    """Paths of the depth and mid arrays for a UTC day number (ms since epoch // DAY_MS)"""
+    date = datetime.fromtimestamp(day * DAY_MS / 1000, timezone.utc).strftime("%Y%m%d")
+    base = os.path.join(directory, f"{symbol}_{bucket_ms}ms_{date}")
+    return f"{base}_depth.npy", f"{base}_mid.npy"
+
+
+def query_depth(directory, symbol, start_ms, end_ms, bucket_ms=1000, step_ms=None):
+    """
+    Read recorded depth for [start_ms, end_ms). Returns (times_ms, mids, depth,
+    band_offsets_bps); only buckets that were recorded are returned.
+    step_ms, a multiple of bucket_ms, averages consecutive buckets for coarser heatmaps.
+    """
+    with open(os.path.join(directory, f"{symbol}_{bucket_ms}ms_meta.json"), "r") as f:
+        meta = json.load(f)
+    n_bands, band_bps = meta["n_bands"], meta["band_bps"]
+
+    times, mids, depths = [], [], []
+    start_ms -= start_ms % bucket_ms
+    for day in range(start_ms // DAY_MS, (end_ms - 1) // DAY_MS + 1):
+        depth_path, mid_path = day_paths(directory, symbol, bucket_ms, day)
+        if not os.path.exists(depth_path):
+            continue
+        day_start = day * DAY_MS
+        first = max(start_ms, day_start)
+        last = min(end_ms, day_start + DAY_MS)
+        lo = (first - day_start) // bucket_ms
+        hi = (last - day_start + bucket_ms - 1) // bucket_ms
+
+        day_mids = np.load(mid_path, mmap_mode="r")[lo:hi]
+        recorded = np.nonzero(day_mids)[0]
+        times.append(day_start + (lo + recorded) * bucket_ms)
+        mids.append(np.asarray(day_mids[recorded]))
+        depths.append(np.asarray(np.load(depth_path, mmap_mode="r")[lo:hi][recorded]))
+
+    times = np.concatenate(times) if times else np.empty(0, dtype=np.int64)
+    mids = np.concatenate(mids) if mids else np.empty(0)
+    depth = np.concatenate(depths) if depths else np.empty((0, 2 * n_bands), dtype=np.float32)
+
+    if step_ms and step_ms > bucket_ms and len(times):
+        groups = times // step_ms
+        keys, first_index, counts = np.unique(groups, return_index=True, return_counts=True)
+        mids = np.add.reduceat(mids, first_index) / counts
+        depth = np.add.reduceat(depth, first_index, axis=0) / counts[:, None]
+        times = keys * step_ms
+
+    # Lower price edge of each column's band relative to mid, in bps
+    band_offsets_bps = np.concatenate([-np.arange(n_bands, 0, -1) * band_bps, np.arange(n_bands) * band_bps])
+    return times, mids, depth, band_offsets_bps
+
+
+class BybitDepthRecorder(BybitWebSocket):
+    """
+    Maintains order books from `orderbook.{depth}.{symbol}` topics and records
+    them into a DepthHeatmapStore per symbol instead of logging every update.
+    """
+
+    def __init__(self, url, symbols, directory, depth=50, bucket_ms=1000, band_bps=1.0, n_bands=50):
+        symbols = symbols if isinstance(symbols, (list, tuple)) else [symbols]
+        self.books = {symbol: OrderBook(symbol) for symbol in symbols}
+        self.stores = {
+            symbol: DepthHeatmapStore(directory, symbol, bucket_ms=bucket_ms, band_bps=band_bps, n_bands=n_bands)
+            for symbol in symbols
+        }
+        super().__init__(url, [f"orderbook.{depth}.{symbol}" for symbol in symbols])
+
+    def on_open(self, ws):
+        # Bybit resends a snapshot after resubscribing; discard state from the old connection
+        for book in self.books.values():
+            book.update_id = None
+        super().on_open(ws)
+
+    def on_close(self, ws, close_status_code, close_msg):
+        # Write the last bucket and leave the disconnected stretch empty instead of carrying the book over it
+        for symbol, store in self.stores.items():
+            store.close(self.books[symbol])
+        super().on_close(ws, close_status_code, close_msg)
+
+    def process_message(self, data):
+        """Apply the update to the local book and sample it into the depth store"""
+        try:
+            symbol = data["topic"].rsplit(".", 1)[1]
+            book = self.books[symbol]
+            self.stores[symbol].record(int(data.get("ts") or time.time() * 1000), book)
+            book.apply(data)
+        except Exception as e:
+            logger.error(f"Error recording orderbook data: {e}")
+            logger.debug(f"Data: {data}")
+
+    def close(self):
+        super().close()
+        for symbol, store in self.stores.items():
+            store.close(self.books[symbol])
+
+
+def main():
+    logger.info("Recording Bybit order book depth for BTCUSDT...")
+
+    client = BybitDepthRecorder('wss://stream.bybit.com/v5/public/spot', ["BTCUSDT"], "depth_store",
+                                depth=50, bucket_ms=1000, band_bps=1.0, n_bands=50)
+    client.connect()
+
+    try:
+        # Keep the main thread running
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Keyboard interrupt received, exiting...")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import csv
+import os
+import time
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from bybit_orderbook_ws import BybitWebSocket
+
+logger = logging.getLogger(__name__)
+
+# Public WebSocket endpoint per category
+WS_URLS = {
+    "spot": "wss://stream.bybit.com/v5/public/spot",
+    "linear": "wss://stream.bybit.com/v5/public/linear",
+    "inverse": "wss://stream.bybit.com/v5/public/inverse"
+}
+
+# Candle length in milliseconds for each Bybit interval
+INTERVAL_MS = {
+    "1": 60_000,
+    "3": 180_000,
+    "5": 300_000,
+    "15": 900_000,
+    "30": 1_800_000,
+    "60": 3_600_000,
+    "120": 7_200_000,
+    "240": 14_400_000,
+    "360": 21_600_000,
+    "720": 43_200_000,
+    "D": 86_400_000
+}
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Same column layout as the CSV written by extract_data in "First & Third/data.py"
+CSV_COLUMNS = [
+    "IST_timestamp", "UTC_timestamp", "open", "high", "low", "close", "volume", "turnover",
+    "datetime_ist", "symbol", "category", "interval", "VWAP",
+    "MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9"
+]
+
+# Minimum rows of an existing CSV replayed to warm up the MACD state; VWAP
+# additionally needs every row since the start of the last IST day
+WARMUP_ROWS = 500
+
+# Trades may arrive slightly after their interval ended on the wall clock
+CLOSE_GRACE_MS = 2000
+
+
+class EMA:
+    """Incremental EMA seeded with an SMA of the first `length` values, like pandas_ta.ema"""
+
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.seed = []
+        self.value = None
+
+    def update(self, x):
+        if self.value is None:
+            self.seed.append(x)
+            if len(self.seed) == self.length:
+                self.value = sum(self.seed) / self.length
+            return self.value
+        self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class IndicatorState:
+    """
+    Incremental VWAP (anchored to the IST day, as pandas_ta.vwap on the IST index)
+    and MACD(12, 26, 9) for one symbol/interval.
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.vwap_day = None
+        self.cum_pv = 0.0
+        self.cum_volume = 0.0
+
+    def update(self, candle):
+        """Feed a closed candle and return its VWAP and MACD values"""
+        day = candle["IST_timestamp"][:10]
+        if day != self.vwap_day:
+            self.vwap_day = day
+            self.cum_pv = 0.0
+            self.cum_volume = 0.0
+
+        typical_price = (candle["high"] + candle["low"] + candle["close"]) / 3
+        self.cum_pv += typical_price * candle["volume"]
+        self.cum_volume += candle["volume"]
+        vwap = self.cum_pv / self.cum_volume if self.cum_volume else None
+
+        fast = self.fast.update(candle["close"])
+        slow = self.slow.update(candle["close"])
+        macd = signal = histogram = None
+        if fast is not None and slow is not None:
+            macd = fast - slow
+            signal = self.signal.update(macd)
+            if signal is not None:
+                histogram = macd - signal
+
+        return {"VWAP": vwap, "MACD_12_26_9": macd, "MACDh_12_26_9": histogram, "MACDs_12_26_9": signal}
+
+
+class KlineCsvWriter:
+    """Appends closed candles with indicators to a kline CSV, warming up from its tail"""
+
+    def __init__(self, file_name, symbol, category, interval):
+        self.file_name = file_name
+        self.symbol = symbol
+        self.category = category
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.indicators = IndicatorState()
+        self.last_start = None
+        self.columns = CSV_COLUMNS
+        self.warm_up()
+
+    def warm_up(self):
+        """
+        Replay the tail of an existing output file so indicators continue
+        seamlessly: the whole last IST day for VWAP, and at least WARMUP_ROWS for MACD.
+        """
+        if not os.path.exists(self.file_name):
+            return
+
+        with open(self.file_name, "r", newline="") as f:
+            reader = csv.DictReader(f)
+            self.columns = reader.fieldnames or CSV_COLUMNS
+            tail = deque(maxlen=WARMUP_ROWS)
+            day_rows = []
+            for row in reader:
+                tail.append(row)
+                if day_rows and (row.get("IST_timestamp") or "")[:10] != (day_rows[-1].get("IST_timestamp") or "")[:10]:
+                    day_rows = []
+                day_rows.append(row)
+
+        # Both are suffixes of the file, so the longer one covers both needs
+        rows = day_rows if len(day_rows) > len(tail) else tail
+
+        for row in rows:
+            try:
+                candle = {
+                    "IST_timestamp": row["IST_timestamp"],
+                    "high": float(row["high"]),
+                    "low": float(row["low"]),
+                    "close": float(row["close"]),
+                    "volume": float(row["volume"])
+                }
+                start = datetime.strptime(row["IST_timestamp"][:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=IST)
+            except (KeyError, TypeError, ValueError):
+                continue  # e.g. a line truncated when the process was killed mid-append
+            self.indicators.update(candle)
+            self.last_start = int(start.timestamp() * 1000)
+
+        logger.info(f"Warmed up {self.symbol} {self.interval} from {len(rows)} rows of {self.file_name}")
+
+    def write(self, start_ms, open_, high, low, close, volume, turnover):
+        """Append one closed candle; duplicates are skipped and gaps are logged for REST repair"""
+        if self.last_start is not None:
+            if start_ms <= self.last_start:
+                return
+            if start_ms - self.last_start > self.interval_ms:
+                gap_from = datetime.fromtimestamp((self.last_start + self.interval_ms) / 1000, IST)
+                gap_to = datetime.fromtimestamp((start_ms - self.interval_ms) / 1000, IST)
+                logger.warning(f"Gap in {self.symbol} {self.interval} candles from "
+                               f"{gap_from:%Y-%m-%d %H:%M} to {gap_to:%Y-%m-%d %H:%M} IST; "
+                               f"backfill it with extract_data")
+
+        utc_dt = datetime.fromtimestamp(start_ms / 1000, timezone.utc)
+        ist_dt = utc_dt.astimezone(IST)
+        candle = {
+            "IST_timestamp": ist_dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "UTC_timestamp": utc_dt.isoformat(sep=" "),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "turnover": turnover,
+            "datetime_ist": ist_dt.isoformat(sep=" "),
+            "symbol": self.symbol,
+            "category": self.category,
+            "interval": self.interval
+        }
+        candle.update(self.indicators.update(candle))
+
+        write_header = not os.path.exists(self.file_name) or os.path.getsize(self.file_name) == 0
+        with open(self.file_name, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns, extrasaction="ignore")
+            if write_header:
+                writer.writeheader()
+            writer.writerow({k: ("" if v is None else v) for k, v in candle.items()})
+
+        self.last_start = start_ms
+        logger.info(f"Closed {self.symbol} {self.interval} candle {candle['IST_timestamp']} close={close}")
+
+
+class TradeCandleBuilder:
+    """Builds candles for one symbol/interval from public trades"""
+
+    def __init__(self, writer, category):
+        self.writer = writer
+        self.category = category
+        self.interval_ms = writer.interval_ms
+        self.candle = None
+
+    def add_trade(self, ts, price, size):
+        start = ts - ts % self.interval_ms
+        if self.candle is not None and start < self.candle["start"]:
+            return  # late trade for an already closed candle
+        self.close_until(start)
+
+        # Inverse contracts are sized in USD, so turnover is in coin
+        turnover = size / price if self.category == "inverse" else size * price
+        if self.candle is None:
+            self.candle = {"start": start, "open": price, "high": price, "low": price,
+                           "close": price, "volume": 0.0, "turnover": 0.0}
+        c = self.candle
+        c["high"] = max(c["high"], price)
+        c["low"] = min(c["low"], price)
+        c["close"] = price
+        c["volume"] += size
+        c["turnover"] += turnover
+
+    def close_until(self, start):
+        """Close the open candle if `start` is past it, filling empty buckets flat"""
+        if self.candle is None or start <= self.candle["start"]:
+            return
+        c = self.candle
+        self.writer.write(c["start"], c["open"], c["high"], c["low"], c["close"], c["volume"], c["turnover"])
+
+        # Bybit reports trade-less intervals as flat zero-volume candles
+        empty_start = c["start"] + self.interval_ms
+        while empty_start < start:
+            self.writer.write(empty_start, c["close"], c["close"], c["close"], c["close"], 0.0, 0.0)
+            empty_start += self.interval_ms
+        self.candle = None
+
+
+class BybitKlineWebSocket(BybitWebSocket):
+    """
+    Streams `kline.{interval}.{symbol}` or `publicTrade.{symbol}` topics and
+    appends closed candles, with VWAP/MACD updated incrementally, to the same
+    CSV layout that extract_data produces.
+
+    `file_names` maps (symbol, interval) to an output path, e.g. a CSV written by
+    extract_data to keep extending it; other pairs go to `{symbol}_{category}_{interval}_live.csv`.
+    """
+
+    def __init__(self, symbols, intervals=("15",), category="spot", source="kline", output_dir=".", file_names=None):
+        symbols = symbols if isinstance(symbols, (list, tuple)) else [symbols]
+        intervals = [str(i) for i in (intervals if isinstance(intervals, (list, tuple)) else [intervals])]
+        for interval in intervals:
+            if interval not in INTERVAL_MS:
+                raise ValueError(f"Unsupported interval: {interval}")
+
+        self.category = category
+        self.source = source
+        file_names = file_names or {}
+        self.writers = {
+            (symbol, interval): KlineCsvWriter(
+                file_names.get((symbol, interval)) or os.path.join(output_dir, f"{symbol}_{category}_{interval}_live.csv"),
+                symbol, category, interval
+            )
+            for symbol in symbols for interval in intervals
+        }
+
+        if source == "kline":
+            topics = [f"kline.{interval}.{symbol}" for symbol in symbols for interval in intervals]
+            self.builders = {}
+        elif source == "trade":
+            topics = [f"publicTrade.{symbol}" for symbol in symbols]
+            self.builders = {key: TradeCandleBuilder(writer, category) for key, writer in self.writers.items()}
+        else:
+            raise ValueError(f"Unsupported source: {source}")
+
+        super().__init__(WS_URLS[category], topics)
+
+    def process_message(self, data):
+        """Route kline and trade messages to the candle builders"""
+        try:
+            topic = data["topic"]
+            if topic.startswith("kline."):
+                self.process_kline(topic, data.get("data", []))
+            elif topic.startswith("publicTrade."):
+                self.process_trades(data.get("data", []))
+        except Exception as e:
+            logger.error(f"Error processing candle data: {e}")
+            logger.debug(f"Data: {data}")
+
+    def process_kline(self, topic, klines):
+        """Write confirmed (closed) klines"""
+        _, interval, symbol = topic.split(".", 2)
+        writer = self.writers[(symbol, interval)]
+        for k in klines:
+            if k.get("confirm"):
+                writer.write(int(k["start"]), float(k["open"]), float(k["high"]), float(k["low"]),
+                             float(k["close"]), float(k["volume"]), float(k["turnover"]))
+
+    def process_trades(self, trades):
+        """Aggregate trades into every configured interval for their symbol"""
+        for trade in trades:
+            for (symbol, _), builder in self.builders.items():
+                if symbol == trade["s"]:
+                    builder.add_trade(int(trade["T"]), float(trade["p"]), float(trade["v"]))
+
+        # Close candles whose interval ended even if that symbol has not traded since
+        now_ms = int(time.time() * 1000) - CLOSE_GRACE_MS
+        for builder in self.builders.values():
+            builder.close_until(now_ms - now_ms % builder.interval_ms)
+
+
+def main():
+    logger.info("Starting Bybit WebSocket kline stream...")
+
+    client = BybitKlineWebSocket(["BTCUSDT", "ETHUSDT"], intervals=["1", "15"], category="spot", source="kline")
+    client.connect()
+
+    try:
+        # Keep the main thread running
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Keyboard interrupt received, exiting...")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -68,12 +68,14 @@ class BybitWebSocket:
 
     def subscribe_to_topics(self):
         """Subscribe to the specified topics"""
-        subscribe_data = {
-            "op": "subscribe",
-            "args": self.topics,
-            "req_id": str(uuid.uuid4())
-        }
-        self.ws.send(json.dumps(subscribe_data))
+        # Spot accepts at most 10 args per subscribe request
+        for i in range(0, len(self.topics), 10):
+            subscribe_data = {
+                "op": "subscribe",
+                "args": self.topics[i:i + 10],
+                "req_id": str(uuid.uuid4())
+            }
+            self.ws.send(json.dumps(subscribe_data))
         logger.info(f"Subscription request sent for topics: {self.topics}")
 
     def heartbeat(self):
@@ -117,14 +119,18 @@ class BybitWebSocket:
                     logger.warning(f"Failed to subscribe: {data.get('ret_msg', 'Unknown error')}")
                 return
             
-            # Process order book data
+            # Process topic data
             if "topic" in data and data["topic"] in self.topics:
-                self.process_orderbook(data)
+                self.process_message(data)
         
         except Exception as e:
             logger.error(f"Error processing message: {e}")
             logger.debug(f"Message was: {message[:200]}...")  # Print first 200 chars of message
 
+    def process_message(self, data):
+        """Handle a message for a subscribed topic; subclasses override for other streams"""
+        self.process_orderbook(data)
+
     def process_orderbook(self, data):
         """Process and display order book data"""
         try:
@@ -1,31 +1,79 @@
-import requests
-import pandas as pd
+import time
 from datetime import datetime, timedelta
-import pytz
-import pandas_ta as ta
-from datetime import datetime, timedelta
-from celery import Celery
-from fake_useragent import UserAgent
 
-# Configure Celery
-app = Celery('bybit_tasks',
-             broker='redis://:maisha123@localhost:6379/0',
-             backend='redis://:maisha123@localhost:6379/0')
+from progress import TaskStats
+
+# Heavy dependencies (pandas, pandas_ta, requests, Celery) are imported where
+# they are used, so importing this module and forking workers stays fast.
+
+BROKER_URL = 'redis://:maisha123@localhost:6379/0'
+
+_app = None
+_extract_data_task = None
+
+
+def get_celery_app():
+    """
+    Build the Celery app and register its tasks on first use.
+    """
+    global _app, _extract_data_task
+    if _app is None:
+        from celery import Celery
+
+        # Configure Celery
+        app = Celery('bybit_tasks', broker=BROKER_URL, backend=BROKER_URL)
+
+        # Optional Celery configuration
+        app.conf.update(
+            task_serializer='json',
+            accept_content=['json'],
+            result_serializer='json',
+            timezone='Asia/Kolkata',
+            enable_utc=True,
+        )
+
+        _extract_data_task = app.task(name="bybit_tasks.extract_data_task", bind=True)(extract_data_task)
+        _app = app
+    return _app
+
+
+def extract_data_task(self, start_date, end_date, symbol, category, interval):
+    """
+    Celery task body: runs extract_data and publishes each progress event as
+    the custom "PROGRESS" task state, readable via AsyncResult.info.
+    """
+    def publish(event):
+        self.update_state(state="PROGRESS", meta=event)
+
+    return extract_data(start_date, end_date, symbol, category, interval, progress_callback=publish)
+
+
+def get_extract_data_task():
+    """
+    Return the Celery task wrapping extract_data.
+    """
+    get_celery_app()
+    return _extract_data_task
+
 
-# Optional Celery configuration
-app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
-    timezone='Asia/Kolkata',
-    enable_utc=True,
-)
+def __getattr__(name):
+    # `celery -A data worker` looks up `data.app`; build it only then
+    if name == "app":
+        return get_celery_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def get_bybit_data(symbol, category, interval, start_date, end_date):
+def get_bybit_data(symbol, category, interval, start_date, end_date, stats=None):
     """
     Fetch historical kline (candlestick) data from Bybit API and compute indicators.
+    Request latency and fetch/decode/indicators timings are recorded in `stats`.
     """
+    import requests
+    import pandas as pd
+    import pandas_ta as ta
+    from fake_useragent import UserAgent
+
+    stats = stats or TaskStats()
     try:
         # Convert date to UTC timestamp in milliseconds
         start_ts = to_milliseconds(start_date, tz_str="Asia/Kolkata")
@@ -44,42 +92,48 @@ def get_bybit_data(symbol, category, interval, start_date, end_date):
         }
 
         # Make GET request to Bybit API
-        response = requests.get(
-            "https://api.bybit.com/v5/market/kline",
-            params=params,
-            headers=headers
-        )
-        response.raise_for_status()
-        result = response.json()
-
-        # Handle API errors or empty result
-        if result["retCode"] != 0 or not result["result"]["list"]:
-            print(f"No data or error: {result}")
-            return pd.DataFrame()
-
-        # Extract and format kline data
-        klines = result["result"]["list"]
-        df = pd.DataFrame(klines, columns=[
-            "UTC_timestamp", "open", "high", "low", "close", "volume", "turnover"
-        ])
-
-        df["UTC_timestamp"] = pd.to_datetime(df["UTC_timestamp"].astype(int), unit="ms", utc=True)
-        df["datetime_ist"] = df["UTC_timestamp"].dt.tz_convert("Asia/Kolkata")
-        df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].astype(float)
-        df["IST_timestamp"] = df["datetime_ist"].dt.tz_localize(None)
-        df.set_index("IST_timestamp", inplace=True)
-        df = df[~df.index.duplicated(keep="first")]
-        df.sort_index(inplace=True)
-
-        # Add metadata
-        df["symbol"] = symbol
-        df["category"] = category
-        df["interval"] = interval
+        with stats.stage("fetch"):
+            request_start = time.perf_counter()
+            response = requests.get(
+                "https://api.bybit.com/v5/market/kline",
+                params=params,
+                headers=headers
+            )
+            stats.record_latency(time.perf_counter() - request_start)
+            response.raise_for_status()
+
+        with stats.stage("decode"):
+            result = response.json()
+
+            # Handle API errors or empty result
+            if result["retCode"] != 0 or not result["result"]["list"]:
+                print(f"No data or error: {result}")
+                return pd.DataFrame()
+
+            # Extract and format kline data
+            klines = result["result"]["list"]
+            df = pd.DataFrame(klines, columns=[
+                "UTC_timestamp", "open", "high", "low", "close", "volume", "turnover"
+            ])
+
+            df["UTC_timestamp"] = pd.to_datetime(df["UTC_timestamp"].astype(int), unit="ms", utc=True)
+            df["datetime_ist"] = df["UTC_timestamp"].dt.tz_convert("Asia/Kolkata")
+            df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].astype(float)
+            df["IST_timestamp"] = df["datetime_ist"].dt.tz_localize(None)
+            df.set_index("IST_timestamp", inplace=True)
+            df = df[~df.index.duplicated(keep="first")]
+            df.sort_index(inplace=True)
+
+            # Add metadata
+            df["symbol"] = symbol
+            df["category"] = category
+            df["interval"] = interval
 
         # Add technical indicators
-        df["VWAP"] = ta.vwap(df["high"], df["low"], df["close"], df["volume"])
-        macd = ta.macd(df["close"])
-        df = pd.concat([df, macd], axis=1)
+        with stats.stage("indicators"):
+            df["VWAP"] = ta.vwap(df["high"], df["low"], df["close"], df["volume"])
+            macd = ta.macd(df["close"])
+            df = pd.concat([df, macd], axis=1)
 
         print(f"Records fetched: {len(df)}")
         return df
@@ -94,6 +148,8 @@ def to_milliseconds(dt_str, tz_str="UTC"):
     Convert a datetime string to UTC timestamp in milliseconds.
     Example input: "2021-01-01 12:30"
     """
+    import pytz
+
     try:
         dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
         local = pytz.timezone(tz_str)
@@ -129,45 +185,83 @@ def generate_date_ranges(start_date, end_date, days_in_range=10):
         return []
 
 
-@app.task(name="bybit_tasks.extract_data_task")
-def extract_data(start_date, end_date, symbol, category, interval):
+def extract_data(start_date, end_date, symbol, category, interval, progress_callback=None):
     """
-    Celery task to extract data over date ranges and save to CSV.
+    Extract data over date ranges and save to CSV.
+    Registered as the Celery task "bybit_tasks.extract_data_task" by get_celery_app.
+
+    progress_callback, if given, is called after every date window with a dict
+    of windows done, rows fetched, ETA, request latency percentiles and time
+    spent per stage (see progress.TaskStats.snapshot).
     """
+    stats = TaskStats()
     try:
         date_ranges = generate_date_ranges(start_date, end_date)
+        stats.windows_total = len(date_ranges)
         all_dataframes = []
 
         for i in date_ranges:
-            df = get_bybit_data(symbol, category, interval, i[0], i[1])
+            df = get_bybit_data(symbol, category, interval, i[0], i[1], stats=stats)
             if not df.empty:
                 all_dataframes.append(df)
+                stats.rows += len(df)
+            stats.windows_done += 1
+
+            if progress_callback:
+                progress_callback({"symbol": symbol, "category": category, "interval": interval, **stats.snapshot()})
+
+        return save_kline_data(all_dataframes, start_date, end_date, symbol, category, interval, stats)
+
+    except Exception as e:
+        print("Error in extract_data task:", e)
+        return {"message": "An error occurred while extracting data.", "symbol": symbol, "category": category,
+                "interval": interval, "file_name": None, "records": 0, "stats": stats.snapshot()}
 
-        if len(all_dataframes) > 1:
-            final_df = pd.concat(all_dataframes).sort_index()
-            final_df = final_df[~final_df.index.duplicated(keep="first")]
 
-            # Save final DataFrame to CSV
-            file_name = f"""{symbol}_{category}_{interval}_{start_date.split(" ")[0]}_{end_date.split(" ")[0]}.csv"""
-            final_df.to_csv(file_name)
+def save_kline_data(all_dataframes, start_date, end_date, symbol, category, interval, stats):
+    """
+    Merge the per-window DataFrames of one job, save them to CSV and build the result dict.
+    """
+    import pandas as pd
 
+    result = {"symbol": symbol, "category": category, "interval": interval, "file_name": None, "records": 0}
+    try:
+        if all_dataframes:
+            with stats.stage("write"):
+                final_df = pd.concat(all_dataframes).sort_index()
+                final_df = final_df[~final_df.index.duplicated(keep="first")]
+
+                # Save final DataFrame to CSV
+                file_name = f"""{symbol}_{category}_{interval}_{start_date.split(" ")[0]}_{end_date.split(" ")[0]}.csv"""
+                final_df.to_csv(file_name)
+
+            result.update(file_name=file_name, records=len(final_df))
             print(f"Total records in final DataFrame: {len(final_df)}")
         else:
             print("NO DATA FOUND....................")
 
-        return {"message": "Please wait for a few seconds while it downloads your data."}
+        message = f"Saved {result['records']} records to {result['file_name']}" if result["file_name"] else "No data found."
+        return {"message": message, **result, "stats": stats.snapshot()}
 
     except Exception as e:
-        print("Error in extract_data task:", e)
-        return {"message": "An error occurred while extracting data."}
+        print("Error in save_kline_data:", e)
+        return {"message": "An error occurred while extracting data.", **result, "stats": stats.snapshot()}
 
 
-def run_task(start_date, end_date, symbol, category):
+def run_task(start_date, end_date, symbol, category, backend="celery", progress_callback=None):
     """
     Function to trigger the Celery task asynchronously.
+    With backend "local", "thread" or "process" the extraction runs on this
+    machine without a broker and its result dict is returned instead.
     """
+    if backend != "celery":
+        from executors import run_jobs
+
+        job = {"start_date": start_date, "end_date": end_date, "symbol": symbol, "category": category, "interval": 15}
+        return run_jobs([job], backend=backend, progress_callback=progress_callback)[0]
+
     try:
-        id = extract_data.delay(start_date, end_date, symbol, category, interval=15)
+        id = get_extract_data_task().delay(start_date, end_date, symbol, category, interval=15)
         return {"message": f"Please wait for a few seconds while it downloads your data. TaskId : {id}"}
     except Exception as e:
         print("Error in run_task:", e)
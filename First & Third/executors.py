@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from data import extract_data, generate_date_ranges, get_bybit_data, get_extract_data_task, save_kline_data
+from progress import TaskStats
+
+# "celery" dispatches to workers through the broker; the others run on this machine
+BACKENDS = ("celery", "process", "thread", "local")
+
+
+def make_jobs(symbols, start_date, end_date, category, interval=15):
+    """
+    Build one extract_data job per symbol.
+    """
+    return [
+        {"start_date": start_date, "end_date": end_date, "symbol": symbol, "category": category, "interval": interval}
+        for symbol in symbols
+    ]
+
+
+def _fetch_window(job, window):
+    """
+    Fetch one date window of a job in a worker; returns the DataFrame and the window's timings.
+    """
+    stats = TaskStats()
+    df = get_bybit_data(job["symbol"], job["category"], job["interval"], window[0], window[1], stats=stats)
+    return df, stats.latencies, stats.stages
+
+
+def _run_pool(executor, jobs, progress_callback):
+    """
+    Fan every date window of every job out across the pool, so a single symbol
+    also uses all workers. Windows are merged per job on the calling thread,
+    which also delivers progress events and writes each CSV once its last
+    window is in.
+    """
+    windows = [generate_date_ranges(job["start_date"], job["end_date"]) for job in jobs]
+    stats = [TaskStats(len(job_windows)) for job_windows in windows]
+    frames = [[None] * len(job_windows) for job_windows in windows]
+    results = [None] * len(jobs)
+
+    futures = {
+        executor.submit(_fetch_window, job, window): (j, w)
+        for j, job in enumerate(jobs)
+        for w, window in enumerate(windows[j])
+    }
+
+    for future in as_completed(futures):
+        j, w = futures[future]
+        job, job_stats = jobs[j], stats[j]
+        try:
+            df, latencies, stages = future.result()
+        except Exception as e:
+            print(f"Error in {job['symbol']} window {windows[j][w]}:", e)
+            df, latencies, stages = None, [], {}
+
+        job_stats.latencies.extend(latencies)
+        for name, seconds in stages.items():
+            job_stats.stages[name] = job_stats.stages.get(name, 0.0) + seconds
+        if df is not None and not df.empty:
+            frames[j][w] = df
+            job_stats.rows += len(df)
+        job_stats.windows_done += 1
+
+        if progress_callback:
+            progress_callback({"symbol": job["symbol"], "category": job["category"], "interval": job["interval"],
+                               **job_stats.snapshot()})
+
+        if job_stats.windows_done == job_stats.windows_total:
+            results[j] = save_kline_data([df for df in frames[j] if df is not None], stats=job_stats, **job)
+            frames[j] = None
+
+    # Jobs without any window (e.g. an invalid date range)
+    for j, job in enumerate(jobs):
+        if results[j] is None:
+            results[j] = save_kline_data([], stats=stats[j], **job)
+    return results
+
+
+def run_jobs(jobs, backend="process", max_workers=None, progress_callback=None):
+    """
+    Run extract_data jobs on the chosen backend.
+
+    The local backends ("process", "thread" and "local") block until all jobs
+    finish and return the extract_data result dicts in job order; progress
+    events are delivered to progress_callback on the calling thread.
+    "process" and "thread" spread the 10-day date windows of all jobs across
+    the pool; "local" runs them one after another in this process.
+    "celery" only dispatches the jobs and returns their task ids.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if not jobs:
+        return []
+
+    if backend == "celery":
+        task = get_extract_data_task()
+        return [{"message": "Task dispatched.", "symbol": job["symbol"], "task_id": task.delay(**job).id}
+                for job in jobs]
+
+    if backend == "local":
+        return [extract_data(**job, progress_callback=progress_callback) for job in jobs]
+
+    if backend == "thread":
+        with ThreadPoolExecutor(max_workers=max_workers or 32) as executor:
+            return _run_pool(executor, jobs, progress_callback)
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+        return _run_pool(executor, jobs, progress_callback)
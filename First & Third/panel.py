@@ -0,0 +1,151 @@
+import glob
+import json
+import os
+from collections import namedtuple
+
+# Builds a time x symbol x field panel from the per-symbol CSVs written by
+# extract_data, aligned on one shared time grid and stored as .npy files so it
+# can be memory-mapped back without parsing.
+
+DEFAULT_FIELDS = (
+    "open", "high", "low", "close", "volume", "turnover",
+    "VWAP", "MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9"
+)
+
+# pandas frequency for each Bybit kline interval ("M" is irregular and not supported)
+INTERVAL_FREQ = {
+    "1": "1min", "3": "3min", "5": "5min", "15": "15min", "30": "30min",
+    "60": "60min", "120": "120min", "240": "240min", "360": "360min", "720": "720min",
+    "D": "1D", "W": "7D"
+}
+
+Panel = namedtuple("Panel", ["data", "mask", "times", "symbols", "fields", "meta"])
+
+
+def build_panel(csv_files, out_dir, interval="15", start=None, end=None, fields=DEFAULT_FIELDS, dtype="float64"):
+    """
+    Align kline CSVs for N symbols onto one time grid and save them to `out_dir` as
+    data.npy (time x symbol x field, NaN where missing), mask.npy (time x symbol,
+    True where a candle exists) and meta.json.
+
+    csv_files is a list of paths or a glob pattern. Several files for the same
+    symbol (e.g. consecutive date ranges) are merged and de-duplicated.
+    start/end are IST datetime strings; by default the grid spans all the data.
+    """
+    import numpy as np
+    import pandas as pd
+
+    try:
+        interval = str(interval)
+        if interval not in INTERVAL_FREQ:
+            print(f"Unsupported interval for panel: {interval}")
+            return None
+        freq = INTERVAL_FREQ[interval]
+
+        if isinstance(csv_files, str):
+            csv_files = sorted(glob.glob(csv_files))
+        if not csv_files:
+            print("No CSV files to build a panel from.")
+            return None
+
+        # Load and merge every file per symbol
+        frames = {}
+        for file_name in csv_files:
+            df = pd.read_csv(file_name, index_col="IST_timestamp", parse_dates=["IST_timestamp"])
+            if "interval" in df.columns and not df.empty and str(df["interval"].iloc[0]) != interval:
+                print(f"Skipping {file_name}: interval {df['interval'].iloc[0]} != {interval}")
+                continue
+            symbol = str(df["symbol"].iloc[0]) if "symbol" in df.columns and not df.empty else \
+                os.path.basename(file_name).split("_")[0]
+            frames.setdefault(symbol, []).append(df.reindex(columns=list(fields)))
+
+        symbols = sorted(frames)
+        for symbol in symbols:
+            df = pd.concat(frames[symbol]).sort_index()
+            frames[symbol] = df[~df.index.duplicated(keep="first")]
+
+        # Shared grid covering all symbols (or the requested range). Bybit opens
+        # candles on UTC boundaries, which for 60m and above are not on whole IST
+        # hours/days, so the grid is anchored on the first real candle (origin)
+        # rather than floored in IST, and extended back in whole steps to start.
+        step = pd.Timedelta(freq)
+        starts = [df.index[df.index >= pd.Timestamp(start)] if start else df.index for df in frames.values()]
+        starts = [index.min() for index in starts if len(index)]
+        if not starts:
+            print("No candles in the requested range.")
+            return None
+        origin = min(starts)
+        first = origin - ((origin - pd.Timestamp(start)) // step) * step if start else origin
+        last = pd.Timestamp(end) if end else max(df.index.max() for df in frames.values())
+        grid = pd.date_range(first, last, freq=freq)
+        if grid.empty:
+            print("Empty time grid; check start/end.")
+            return None
+
+        os.makedirs(out_dir, exist_ok=True)
+        data = np.lib.format.open_memmap(os.path.join(out_dir, "data.npy"), mode="w+", dtype=dtype,
+                                         shape=(len(grid), len(symbols), len(fields)))
+        mask = np.lib.format.open_memmap(os.path.join(out_dir, "mask.npy"), mode="w+", dtype=bool,
+                                         shape=(len(grid), len(symbols)))
+
+        for s, symbol in enumerate(symbols):
+            df = frames[symbol]
+            in_range = df.index[(df.index >= grid[0]) & (df.index <= grid[-1])]
+            off_grid = int((~in_range.isin(grid)).sum())
+            if off_grid:
+                print(f"{symbol}: dropped {off_grid} rows not on the {interval} grid")
+
+            aligned = df.reindex(grid)
+            data[:, s, :] = aligned.to_numpy(dtype=dtype)
+            present = aligned["close"].notna() if "close" in fields else aligned.notna().any(axis=1)
+            mask[:, s] = present.to_numpy()
+            print(f"{symbol}: {int(mask[:, s].sum())}/{len(grid)} candles, {len(grid) - int(mask[:, s].sum())} gaps")
+
+        data.flush()
+        mask.flush()
+
+        meta = {
+            "symbols": symbols,
+            "fields": list(fields),
+            "interval": interval,
+            "freq": freq,
+            "start": grid[0].isoformat(),
+            "origin": origin.isoformat(),
+            "periods": len(grid),
+            "timezone": "Asia/Kolkata",
+            "dtype": str(np.dtype(dtype))
+        }
+        with open(os.path.join(out_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        print(f"Panel saved to '{out_dir}': {len(grid)} x {len(symbols)} x {len(fields)}")
+        return load_panel(out_dir)
+
+    except Exception as e:
+        print("Error in build_panel:", e)
+        return None
+
+
+def load_panel(out_dir, mmap_mode="r"):
+    """
+    Memory-map a panel saved by build_panel; no data is read until it is accessed.
+    """
+    import numpy as np
+    import pandas as pd
+
+    with open(os.path.join(out_dir, "meta.json"), "r") as f:
+        meta = json.load(f)
+
+    data = np.load(os.path.join(out_dir, "data.npy"), mmap_mode=mmap_mode)
+    mask = np.load(os.path.join(out_dir, "mask.npy"), mmap_mode=mmap_mode)
+    times = pd.date_range(meta["start"], periods=meta["periods"], freq=meta["freq"], name="IST_timestamp")
+    return Panel(data, mask, times, meta["symbols"], meta["fields"], meta)
+
+
+def panel_frame(panel, field):
+    """
+    Return one field of a panel as a time x symbol DataFrame.
+    """
+    import pandas as pd
+
+    return pd.DataFrame(panel.data[:, :, panel.fields.index(field)], index=panel.times, columns=panel.symbols)
@@ -0,0 +1,162 @@
+import math
+import time
+from contextlib import contextmanager
+
+# Pipeline stages timed by get_bybit_data and extract_data
+STAGES = ("fetch", "decode", "indicators", "write")
+
+# Upper bounds (ms) of the request latency histogram; mergeable across tasks
+LATENCY_BUCKETS_MS = (50, 100, 200, 400, 800, 1600, 3200, 6400, float("inf"))
+
+
+class TaskStats:
+    """
+    Collects progress, request latencies and per-stage timings for one kline job.
+    """
+
+    def __init__(self, windows_total=0):
+        self.started = time.time()
+        self.windows_total = windows_total
+        self.windows_done = 0
+        self.rows = 0
+        self.latencies = []
+        self.stages = dict.fromkeys(STAGES, 0.0)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work under the given stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def record_latency(self, seconds):
+        self.latencies.append(seconds * 1000)
+
+    def snapshot(self):
+        """Return a JSON-serializable view, suitable as Celery task state meta"""
+        elapsed = time.time() - self.started
+        rate = self.windows_done / elapsed if elapsed else 0.0
+        remaining = self.windows_total - self.windows_done
+        latencies = sorted(self.latencies)
+
+        return {
+            "windows_done": self.windows_done,
+            "windows_total": self.windows_total,
+            "rows": self.rows,
+            "elapsed": round(elapsed, 3),
+            "eta": round(remaining / rate, 1) if rate else None,
+            "rows_per_sec": round(self.rows / elapsed, 1) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": round(latencies[-1], 1) if latencies else None
+            },
+            "latency_histogram": histogram(latencies),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()}
+        }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[index], 1)
+
+
+def histogram(latencies):
+    counts = [0] * len(LATENCY_BUCKETS_MS)
+    for value in latencies:
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if value <= bound:
+                counts[i] += 1
+                break
+    return counts
+
+
+def histogram_percentile(counts, pct):
+    """Upper bucket bound (ms) containing the given percentile"""
+    total = sum(counts)
+    if not total:
+        return None
+    target = pct / 100 * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, counts):
+        seen += count
+        if seen >= target:
+            return bound
+    return LATENCY_BUCKETS_MS[-1]
+
+
+def collect_progress(app, task_name="bybit_tasks.extract_data_task"):
+    """
+    Fetch the progress meta of every running kline task from the workers and
+    result backend, and aggregate throughput, latency and stage timings.
+    """
+    from celery.result import AsyncResult
+
+    active = app.control.inspect().active() or {}
+    tasks = []
+    for worker, worker_tasks in active.items():
+        for task in worker_tasks:
+            if task.get("name") != task_name:
+                continue
+            result = AsyncResult(task["id"], app=app)
+            meta = result.info if result.state == "PROGRESS" and isinstance(result.info, dict) else {}
+            tasks.append({"id": task["id"], "worker": worker, "state": result.state, **meta})
+
+    counts = [0] * len(LATENCY_BUCKETS_MS)
+    stages = dict.fromkeys(STAGES, 0.0)
+    for task in tasks:
+        for i, count in enumerate(task.get("latency_histogram") or []):
+            counts[i] += count
+        for name, seconds in (task.get("stages") or {}).items():
+            stages[name] = stages.get(name, 0.0) + seconds
+
+    etas = [task["eta"] for task in tasks if task.get("eta") is not None]
+    summary = {
+        "tasks": len(tasks),
+        "windows_done": sum(task.get("windows_done", 0) for task in tasks),
+        "windows_total": sum(task.get("windows_total", 0) for task in tasks),
+        "rows": sum(task.get("rows", 0) for task in tasks),
+        "rows_per_sec": round(sum(task.get("rows_per_sec", 0.0) for task in tasks), 1),
+        "eta": max(etas) if etas else None,
+        "latency_ms": {
+            "p50": histogram_percentile(counts, 50),
+            "p90": histogram_percentile(counts, 90),
+            "p99": histogram_percentile(counts, 99)
+        },
+        "stages": {name: round(seconds, 3) for name, seconds in stages.items()}
+    }
+    return tasks, summary
+
+
+def format_progress(tasks, summary):
+    """Render collect_progress output as a small text report"""
+    lines = []
+    for task in tasks:
+        lines.append(
+            f"{task.get('symbol', '?'):<10} {task['state']:<9} "
+            f"{task.get('windows_done', 0)}/{task.get('windows_total', 0)} windows  "
+            f"{task.get('rows', 0)} rows  {task.get('rows_per_sec', 0.0)} rows/s  "
+            f"eta {task.get('eta')}s  p50/p90/p99 {task.get('latency_ms', {}).get('p50')}/"
+            f"{task.get('latency_ms', {}).get('p90')}/{task.get('latency_ms', {}).get('p99')} ms  "
+            f"[{task['worker']}]"
+        )
+
+    latency = summary["latency_ms"]
+    lines.append(
+        f"TOTAL {summary['tasks']} tasks  {summary['windows_done']}/{summary['windows_total']} windows  "
+        f"{summary['rows']} rows  {summary['rows_per_sec']} rows/s  eta {summary['eta']}s  "
+        f"latency <= {latency['p50']}/{latency['p90']}/{latency['p99']} ms (p50/p90/p99)"
+    )
+
+    stage_total = sum(summary["stages"].values())
+    if stage_total:
+        lines.append("stages  " + "  ".join(
+            f"{name} {seconds:.1f}s ({seconds / stage_total:.0%})" for name, seconds in summary["stages"].items()
+        ))
+    return "\n".join(lines)
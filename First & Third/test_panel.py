@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from panel import build_panel, load_panel
+
+
+def write_candles(path, symbol, interval, times):
+    """Write a kline CSV shaped like extract_data's output"""
+    close = np.arange(len(times), dtype=float) + 100
+    df = pd.DataFrame({
+        "symbol": symbol, "interval": interval,
+        "open": close, "high": close + 1, "low": close - 1, "close": close,
+        "volume": 1.0, "turnover": close
+    }, index=pd.Index(times, name="IST_timestamp"))
+    df.to_csv(path)
+
+
+def utc_candles(freq, periods):
+    """Candle open times on UTC boundaries, as naive IST timestamps (:30 past the hour)"""
+    times = pd.date_range("2024-12-01", periods=periods, freq=freq, tz="UTC")
+    return times.tz_convert("Asia/Kolkata").tz_localize(None)
+
+
+@pytest.mark.parametrize("interval, freq", [("15", "15min"), ("60", "60min"), ("D", "1D")])
+def test_panel_covers_utc_aligned_candles(tmp_path, interval, freq):
+    times = utc_candles(freq, 48)
+    for symbol in ("BTCUSD", "ETHUSD"):
+        write_candles(tmp_path / f"{symbol}_inverse_{interval}.csv", symbol, interval, times)
+
+    panel = build_panel(str(tmp_path / "*.csv"), str(tmp_path / "panel"), interval=interval)
+
+    assert panel is not None
+    assert panel.mask.shape == (48, 2)
+    assert panel.mask.all()
+    assert (panel.times == times).all()
+    assert panel.data[-1, 0, panel.fields.index("close")] == 147
+
+    with open(tmp_path / "panel" / "meta.json") as f:
+        meta = json.load(f)
+    assert meta["origin"] == times[0].isoformat()
+    assert (load_panel(str(tmp_path / "panel")).times == times).all()
+
+
+def test_panel_start_before_first_candle(tmp_path):
+    times = utc_candles("60min", 48)
+    write_candles(tmp_path / "BTCUSD_inverse_60.csv", "BTCUSD", "60", times)
+
+    panel = build_panel(str(tmp_path / "*.csv"), str(tmp_path / "panel"), interval="60", start="2024-12-01 00:00")
+
+    # The grid is extended back from the first candle in whole hours, staying on :30
+    assert panel.times[0] == pd.Timestamp("2024-12-01 00:30")
+    assert int(panel.mask.sum()) == 48
+    assert not panel.mask[:5, 0].any()
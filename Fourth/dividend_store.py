@@ -0,0 +1,262 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+
+from get_dividend import create_session, fetch_dividend_history, get_salt, load_isins
+
+DAY = 24 * 60 * 60  # seconds
+
+# Approximate days between payments for each dividend cycle
+CYCLE_PERIOD_DAYS = {
+    "yearly": 365,
+    "half-yearly": 182,
+    "quarterly": 91,
+    "monthly": 30
+}
+
+# How long a fetch stays fresh for each cycle; yearly payers rarely change
+CYCLE_TTL = {
+    "yearly": 30 * DAY,
+    "half-yearly": 14 * DAY,
+    "quarterly": 7 * DAY,
+    "monthly": 2 * DAY
+}
+DEFAULT_TTL = 7 * DAY
+
+# Within this many days either side of the next expected payment, refresh daily
+PAYMENT_WINDOW_DAYS = 14
+PAYMENT_WINDOW_TTL = 1 * DAY
+
+
+class DividendStore:
+    """
+    Local SQLite store of dividend history keyed by ISIN.
+
+    Every ISIN records when it was last fetched, its latest dividendLastPayment
+    and the projected next payment date, so routine runs only hit the API for
+    ISINs whose cycle-based TTL has expired.
+    """
+
+    def __init__(self, path="dividend_store.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.create_tables()
+
+    def create_tables(self):
+        """Create tables and the next-payment index if they don't exist"""
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS isins (
+                isin TEXT PRIMARY KEY,
+                last_fetched REAL NOT NULL,
+                last_payment TEXT,
+                dividend_cycle TEXT,
+                next_expected TEXT
+            );
+            CREATE TABLE IF NOT EXISTS dividends (
+                isin TEXT NOT NULL,
+                payment_date TEXT NOT NULL,
+                dividend_cycle TEXT,
+                value REAL,
+                currency TEXT,
+                PRIMARY KEY (isin, payment_date)
+            );
+            CREATE INDEX IF NOT EXISTS idx_isins_next_expected ON isins (next_expected);
+            """
+        )
+        self.conn.commit()
+
+    def get_state(self, isin):
+        """Return the stored fetch state for an ISIN, or None if never fetched"""
+        row = self.conn.execute(
+            "SELECT last_fetched, last_payment, dividend_cycle, next_expected FROM isins WHERE isin = ?",
+            (isin,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(["last_fetched", "last_payment", "dividend_cycle", "next_expected"], row))
+
+    def is_stale(self, isin, now=None):
+        """Decide whether an ISIN needs a refresh based on its dividend cycle"""
+        now = now or time.time()
+        state = self.get_state(isin)
+        if state is None:
+            return True
+
+        ttl = CYCLE_TTL.get((state["dividend_cycle"] or "").lower(), DEFAULT_TTL)
+
+        # Tighten the TTL around the expected payment; once the window has
+        # passed without a payment (skipped or cut), fall back to the cycle TTL
+        if state["next_expected"]:
+            next_expected = datetime.strptime(state["next_expected"], "%Y-%m-%d")
+            window = timedelta(days=PAYMENT_WINDOW_DAYS)
+            if next_expected - window <= datetime.fromtimestamp(now) <= next_expected + window:
+                ttl = PAYMENT_WINDOW_TTL
+
+        return now - state["last_fetched"] >= ttl
+
+    def save_records(self, isin, records, fetched_at=None):
+        """Upsert dividend rows for an ISIN and update its fetch state"""
+        fetched_at = fetched_at or time.time()
+
+        rows = []
+        for single_record in records:
+            payment_date = single_record.get('dividendLastPayment')
+            if not payment_date:
+                continue
+            rows.append((
+                isin,
+                payment_date[:10],
+                (single_record.get('dividendCycle') or {}).get('translations', {}).get('en'),
+                single_record.get('dividendValue'),
+                single_record.get('dividendCurrency')
+            ))
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO dividends (isin, payment_date, dividend_cycle, value, currency) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+
+        latest = max(rows, key=lambda row: row[1]) if rows else None
+        last_payment = latest[1] if latest else None
+        cycle = latest[2] if latest else None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO isins (isin, last_fetched, last_payment, dividend_cycle, next_expected) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (isin, fetched_at, last_payment, cycle, project_next_payment(last_payment, cycle))
+        )
+        self.conn.commit()
+
+    def touch(self, isin, fetched_at=None):
+        """Mark an ISIN as fresh without changing its stored data"""
+        self.conn.execute(
+            "UPDATE isins SET last_fetched = ? WHERE isin = ?",
+            (fetched_at or time.time(), isin)
+        )
+        self.conn.commit()
+
+    def refresh(self, isins, max_workers=16, retries=3, force=False):
+        """
+        Refresh stale ISINs. Known ISINs are first probed for their latest
+        payment only; the full history is fetched just for new ISINs and those
+        whose latest dividendLastPayment changed. Returns request counts.
+        """
+        isins = load_isins(isins)
+        stale = isins if force else [isin for isin in isins if self.is_stale(isin)]
+        stats = {"isins": len(isins), "stale": len(stale), "unchanged": 0, "updated": 0, "failed": 0}
+        if not stale:
+            print(f"All {len(isins)} ISINs are fresh, nothing to fetch.")
+            return stats
+
+        session = create_session(max_workers=max_workers, retries=retries)
+        try:
+            get_salt(session)
+        except Exception as e:
+            print(f"Could not obtain request signing salt: {e}")
+            return stats
+
+        states = {isin: self.get_state(isin) for isin in stale}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(refresh_isin, session, isin, states[isin]): isin
+                for isin in stale
+            }
+            # SQLite writes stay on this thread; workers only do HTTP
+            for future in as_completed(futures):
+                isin = futures[future]
+                try:
+                    outcome, records = future.result()
+                except Exception as e:
+                    print(f"{isin}: error refreshing dividends: {e}")
+                    outcome, records = "failed", None
+
+                if outcome == "unchanged":
+                    self.touch(isin)
+                elif outcome == "updated":
+                    self.save_records(isin, records)
+                stats[outcome] += 1
+
+        print(f"Refreshed {stats['stale']}/{stats['isins']} ISINs: "
+              f"{stats['updated']} updated, {stats['unchanged']} unchanged, {stats['failed']} failed")
+        return stats
+
+    def upcoming_payments(self, days=30, today=None):
+        """
+        Return ISINs whose next payment, projected from the latest
+        dividendLastPayment and the dividend cycle, falls within `days`.
+        These are projected payment dates; the ex-date is usually a few days earlier.
+        """
+        today = today or datetime.now().date()
+        end = today + timedelta(days=days)
+        return pd.read_sql_query(
+            "SELECT isin AS ISIN, next_expected AS Next_expected_payment, last_payment AS Last_dividend_payment, "
+            "dividend_cycle AS Dividend_cycle FROM isins "
+            "WHERE next_expected BETWEEN ? AND ? ORDER BY next_expected",
+            self.conn,
+            params=(today.isoformat(), end.isoformat()),
+            parse_dates=["Next_expected_payment", "Last_dividend_payment"]
+        )
+
+    def get_dividends(self, isins=None):
+        """Return stored dividend history, optionally limited to some ISINs"""
+        query = ("SELECT isin AS ISIN, payment_date AS Last_dividend_payment, dividend_cycle AS Dividend_cycle, "
+                 "value AS Value, currency AS Currency FROM dividends")
+        params = ()
+        if isins:
+            isins = load_isins(isins)
+            query += f" WHERE isin IN ({', '.join('?' for _ in isins)})"
+            params = tuple(isins)
+        query += " ORDER BY isin, payment_date DESC"
+
+        df = pd.read_sql_query(query, self.conn, params=params, parse_dates=["Last_dividend_payment"])
+        return df.set_index("ISIN")
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+
+def project_next_payment(last_payment, cycle):
+    """Project the next payment date from the last one and the dividend cycle"""
+    period = CYCLE_PERIOD_DAYS.get((cycle or "").lower())
+    if not last_payment or not period:
+        return None
+    next_payment = datetime.strptime(last_payment, "%Y-%m-%d") + timedelta(days=period)
+    return next_payment.strftime("%Y-%m-%d")
+
+
+def refresh_isin(session, isin, state):
+    """
+    Conditionally refresh one ISIN. Returns (outcome, records) where outcome is
+    'updated', 'unchanged' or 'failed'. Failed fetches (None from
+    fetch_dividend_history) are never stored, so they are retried next run.
+    A known payer whose probe comes back empty is refetched in full; if it has
+    no history any more it is stored as a non-payer, so the TTL applies to it.
+    """
+    # New ISINs (and known non-payers) are stored even when the history is empty
+    if state is None or not state["last_payment"]:
+        records = fetch_dividend_history(session, isin)
+        return ("failed", None) if records is None else ("updated", records)
+
+    # Cheap probe: only the newest row is needed to know if anything changed
+    latest = fetch_dividend_history(session, isin, page_size=1, max_records=1)
+    if latest is None:
+        return "failed", None
+    if latest and (latest[0].get('dividendLastPayment') or "")[:10] == state["last_payment"]:
+        return "unchanged", None
+
+    records = fetch_dividend_history(session, isin)
+    return ("failed", None) if records is None else ("updated", records)
+
+
+# Main execution
+if __name__ == "__main__":
+    # Example usage: refresh the universe, then list payments due in the next 30 days
+    store = DividendStore()
+    store.refresh(["DE000A1EWWW0"])
+    print(store.upcoming_payments(days=30))
+    store.close()
@@ -1,27 +1,156 @@
 import requests
 import json
-from datetime import datetime
+import os
+import re
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def fetch_dividend_information(isin, x_client_traceid, client_date):
+DIVIDEND_URL = "https://api.boerse-frankfurt.de/v1/data/dividend_information"
+
+# Rows requested per page when walking the full dividend history
+PAGE_SIZE = 50
+
+# The front end signs every API call with a salt embedded in its main JS bundle
+HOME_URL = "https://www.boerse-frankfurt.de/"
+SALT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "salt_cache.json")
+SALT_TTL = 6 * 60 * 60  # seconds
+SALT_MIN_REFRESH = 60  # seconds; an empty page does not re-scrape a salt younger than this
+
+_salt_lock = threading.Lock()
+_salt_cache = {"salt": None, "expires_at": 0, "fetched_at": 0}
+
+
+def fetch_salt(session=None):
+    """
+    Scrapes the current request-signing salt from the Börse Frankfurt front end bundle.
+    """
+    session = session or requests
+    home = session.get(HOME_URL, timeout=30)
+    home.raise_for_status()
+
+    main_js = re.search(r'src="(main\.[\w-]+\.js)"', home.text)
+    if not main_js:
+        raise ValueError("Could not locate main JS bundle on the Börse Frankfurt home page")
+
+    bundle = session.get(HOME_URL + main_js.group(1), timeout=30)
+    bundle.raise_for_status()
+
+    salt = re.search(r'salt:"(\w+)"', bundle.text)
+    if not salt:
+        raise ValueError("Could not locate salt in the Börse Frankfurt JS bundle")
+    return salt.group(1)
+
+
+def get_salt(session=None, force_refresh=False):
+    """
+    Returns the signing salt, using the in-memory or on-disk cache until it expires.
+    """
+    with _salt_lock:
+        now = time.time()
+
+        if not force_refresh and _salt_cache["salt"] and _salt_cache["expires_at"] > now:
+            return _salt_cache["salt"]
+
+        if not force_refresh and os.path.exists(SALT_CACHE_FILE):
+            try:
+                with open(SALT_CACHE_FILE, "r") as f:
+                    cached = json.load(f)
+                if cached.get("salt") and cached.get("expires_at", 0) > now:
+                    _salt_cache.update({"fetched_at": 0, **cached})
+                    return cached["salt"]
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Ignoring unreadable salt cache: {e}")
+
+        return _scrape_salt(session)
+
+
+def refresh_salt(session=None, stale_salt=None, min_age=0):
+    """
+    Re-scrapes the salt after a request signed with `stale_salt` was rejected.
+    If another worker already replaced that salt, or it is younger than
+    `min_age` seconds, the cached salt is returned instead, so concurrent
+    rejections cause a single scrape.
+    """
+    with _salt_lock:
+        cached = _salt_cache["salt"]
+        if cached and (cached != stale_salt or time.time() - _salt_cache["fetched_at"] < min_age):
+            return cached
+        return _scrape_salt(session)
+
+
+def _scrape_salt(session):
+    # Caller must hold _salt_lock
+    now = time.time()
+    _salt_cache.update({"salt": fetch_salt(session), "expires_at": now + SALT_TTL, "fetched_at": now})
+    try:
+        with open(SALT_CACHE_FILE, "w") as f:
+            json.dump(_salt_cache, f)
+    except OSError as e:
+        print(f"Could not write salt cache: {e}")
+
+    return _salt_cache["salt"]
+
+
+def generate_headers(url, params=None, salt=None, session=None):
+    """
+    Generates the client-date, x-client-traceid and x-security headers the
+    front end attaches to each API call. The trace id is bound to the full
+    request URL (including query string), so headers must be generated per request.
+    """
+    salt = salt or get_salt(session)
+    full_url = requests.Request("GET", url, params=params).prepare().url
+
+    client_date = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    trace_id = hashlib.md5(f"{client_date}{full_url}{salt}".encode()).hexdigest()
+    security = hashlib.md5(datetime.now().strftime("%Y%m%d%H%M").encode()).hexdigest()
+
+    return {
+        "client-date": client_date,
+        "x-client-traceid": trace_id,
+        "x-security": security
+    }
+
+
+def fetch_dividend_information(isin, x_client_traceid=None, client_date=None):
     """
     Fetches dividend information from the Börse Frankfurt API for a given ISIN.
+    Request headers are generated automatically unless both are supplied.
     """
-    url = "https://api.boerse-frankfurt.de/v1/data/dividend_information"
+    url = DIVIDEND_URL
 
     params = {
         "isin": isin,
         "limit": 5
     }
 
-    headers = {
-        "client-date": client_date,
-        "x-client-traceid": x_client_traceid
-    }
+    salt = None
+    if x_client_traceid and client_date:
+        headers = {
+            "client-date": client_date,
+            "x-client-traceid": x_client_traceid
+        }
+    else:
+        try:
+            salt = get_salt()
+            headers = generate_headers(url, params, salt=salt)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Could not generate request headers: {e}")
+            return None, None
 
     try:
         response = requests.get(url, params=params, headers=headers)
 
+        # A stale generated signature comes back as 401/403 or an empty body; re-sign once
+        if salt and (response.status_code in (401, 403) or (response.status_code == 200 and not response.text.strip("{} \n"))):
+            headers = generate_headers(url, params, salt=refresh_salt(stale_salt=salt))
+            response = requests.get(url, params=params, headers=headers)
+
         if response.status_code == 200:
             try:
                 data = response.json() if response.text else {}
@@ -41,7 +170,7 @@ def fetch_dividend_information(isin, x_client_traceid, client_date):
             print(f"Request failed with status code: {response.status_code}")
             return response.status_code, None
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Request error: {e}")
         return None, None
 
@@ -78,20 +207,200 @@ def process_dividend_data(data):
         print(f"Error processing dividend data: {e}")
 
 
+def create_session(max_workers=16, retries=3):
+    """
+    Creates a pooled requests session that retries transient failures.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"]
+    )
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_dividend_history(session, isin, page_size=PAGE_SIZE, max_records=None):
+    """
+    Fetches the full dividend history for an ISIN by paging through the API,
+    newest first. Stops early once max_records rows have been collected.
+    Returns the list of raw dividend records (empty for an ISIN without
+    dividends), or None if any request failed, so a partial history is never
+    mistaken for a complete one.
+    """
+    records = []
+    offset = 0
+    refreshed = False
+
+    try:
+        while True:
+            limit = page_size if max_records is None else min(page_size, max_records - offset)
+            params = {
+                "isin": isin,
+                "limit": limit,
+                "offset": offset
+            }
+            salt = get_salt(session)
+            headers = generate_headers(DIVIDEND_URL, params, salt=salt)
+
+            response = session.get(DIVIDEND_URL, params=params, headers=headers, timeout=30)
+            data = None
+            if response.status_code == 200:
+                data = response.json() if response.text else {}
+
+            # A stale signature comes back as 401/403, or as 200 with an empty body.
+            # An empty first page may also be an ISIN without dividends, so it only
+            # re-scrapes a salt that is not brand new; either way retry once
+            rejected = response.status_code in (401, 403) or (data is not None and 'data' not in data)
+            empty_first_page = data is not None and offset == 0 and not data.get('data')
+            if (rejected or empty_first_page) and not refreshed:
+                refresh_salt(session, stale_salt=salt, min_age=0 if rejected else SALT_MIN_REFRESH)
+                refreshed = True
+                continue
+
+            if response.status_code != 200:
+                print(f"{isin}: request failed with status code: {response.status_code}")
+                return None
+
+            # Still no 'data' key with a fresh salt: the request was not accepted
+            if 'data' not in data:
+                print(f"{isin}: response received with status 200 but no data (empty response)")
+                return None
+
+            page = data.get('data') or []
+            records.extend(page)
+
+            # Stop once the API reports everything was returned or a short page comes back
+            total = data.get('recordsTotal')
+            offset += len(page)
+            if len(page) < limit or (total is not None and offset >= total):
+                break
+            if max_records is not None and offset >= max_records:
+                break
+
+    except (requests.exceptions.RequestException, json.JSONDecodeError, ValueError) as e:
+        print(f"{isin}: request error: {e}")
+        return None
+
+    return records
+
+
+def load_isins(isins):
+    """
+    Accepts a list of ISINs or a path to a file with one ISIN per line
+    (a CSV with an 'ISIN' column also works) and returns a de-duplicated list.
+    """
+    if isinstance(isins, str):
+        if isins.endswith(".csv"):
+            isins = pd.read_csv(isins)["ISIN"].tolist()
+        else:
+            with open(isins, "r") as f:
+                isins = f.read().split()
+
+    return list(dict.fromkeys(isin.strip().upper() for isin in isins if isin and isin.strip()))
+
+
+def fetch_bulk_dividends(isins, max_workers=16, retries=3):
+    """
+    Fetches the dividend history for many ISINs concurrently over a pooled session.
+    Returns a dict mapping ISIN -> list of raw dividend records; ISINs whose
+    fetch failed map to None (ISINs without dividends map to an empty list).
+    """
+    isins = load_isins(isins)
+    session = create_session(max_workers=max_workers, retries=retries)
+    results = {}
+
+    # Resolve the signing salt once up front so workers never race to scrape it
+    try:
+        get_salt(session)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Could not obtain request signing salt: {e}")
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_dividend_history, session, isin): isin
+            for isin in isins
+        }
+        for future in as_completed(futures):
+            isin = futures[future]
+            try:
+                results[isin] = future.result()
+            except Exception as e:
+                print(f"{isin}: error fetching dividends: {e}")
+                results[isin] = None
+
+    failed = sorted(isin for isin, records in results.items() if records is None)
+    with_dividends = sum(1 for records in results.values() if records)
+    print(f"Fetched {len(isins)} ISINs: {with_dividends} with dividends, "
+          f"{len(isins) - with_dividends - len(failed)} without, {len(failed)} failed")
+    if failed:
+        print(f"Failed ISINs: {', '.join(failed)}")
+    return results
+
+
+def build_dividend_table(results):
+    """
+    Builds one typed DataFrame keyed by ISIN from the output of fetch_bulk_dividends.
+    """
+    rows = []
+    for isin, records in results.items():
+        # Failed fetches (None) are left out rather than written as empty histories
+        for single_record in records or []:
+            rows.append(
+                {
+                    "ISIN": single_record.get('dividendIsin') or isin,
+                    "Last_dividend_payment": single_record.get('dividendLastPayment'),
+                    "Dividend_cycle": (single_record.get('dividendCycle') or {}).get('translations', {}).get('en'),
+                    "Value": single_record.get('dividendValue'),
+                    "Currency": single_record.get('dividendCurrency')
+                }
+            )
+
+    df = pd.DataFrame(rows, columns=["ISIN", "Last_dividend_payment", "Dividend_cycle", "Value", "Currency"])
+    df["ISIN"] = df["ISIN"].astype("string")
+    df["Last_dividend_payment"] = pd.to_datetime(df["Last_dividend_payment"], errors="coerce")
+    df["Dividend_cycle"] = df["Dividend_cycle"].astype("category")
+    df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
+    df["Currency"] = df["Currency"].astype("category")
+
+    df = df.drop_duplicates(subset=["ISIN", "Last_dividend_payment"])
+    df = df.sort_values(["ISIN", "Last_dividend_payment"], ascending=[True, False])
+    return df.set_index("ISIN")
+
+
+def process_bulk_dividend_data(results, file_name="dividend_data_bulk.csv"):
+    """
+    Saves the consolidated dividend table for many ISINs to a single CSV file.
+    """
+    try:
+        df = build_dividend_table(results)
+        if df.empty:
+            print("No dividend data found to save.")
+            return df
+
+        df.to_csv(file_name)
+        print(f"Dividend data for {df.index.nunique()} ISINs saved to '{file_name}'")
+        return df
+    except Exception as e:
+        print(f"Error processing bulk dividend data: {e}")
+        return None
+
+
 # Main execution
 if __name__ == "__main__":
     # Example usage
-    status_code, data = fetch_dividend_information(
-        "DE000A1EWWW0",
-        "cbc69252e555cafbfea9501408258299",
-        "2025-05-04T15:01:53.823Z"
-    )
+    status_code, data = fetch_dividend_information("DE000A1EWWW0")
 
     print("\nSummary:")
     print(f"- Status code: {status_code}")
 
     if data == {} or data is None:
-        print("Please provide provide cookies data.")
+        print("No dividend data returned for this ISIN.")
     else:
         # Call the function to process and save the dividend data
         process_dividend_data(data)
@@ -0,0 +1,202 @@
+"""
+Command line entry point for the kline, option chain, dividend and order book tools.
+
+Only the standard library is imported at startup; each command imports the
+module (and its heavy dependencies) it needs when it runs.
+
+Examples:
+    python3 cli.py kline BTCUSDT ETHUSDT --category inverse --start "2024-12-01 00:00" --end "2024-12-31 23:45" --backend process
+    python3 cli.py kline-progress --watch 5
+    python3 cli.py panel "*_inverse_15_*.csv" -o panel_15m
+    python3 cli.py options --index NIFTY --date 2025-05-08 -o Nifty_8-May-2025.csv
+    python3 cli.py dividend DE000A1EWWW0 --store dividend_store.db
+    python3 cli.py orderbook BTCUSDT --depth 50
+    python3 cli.py orderbook BTCUSDT ETHUSDT --depth 200 --record depth_store --bucket-ms 100
+    python3 cli.py candles BTCUSDT ETHUSDT --interval 1 15 --source trade
+"""
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_module(folder, name):
+    """Import a task script from its folder (the folder names are not valid packages)"""
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(name)
+
+
+def print_progress(event):
+    print(f"{event['symbol']}: {event['windows_done']}/{event['windows_total']} windows, {event['rows']} rows, "
+          f"{event['rows_per_sec']} rows/s, eta {event['eta']}s")
+
+
+def run_kline(args):
+    executors = load_module("First & Third", "executors")
+    jobs = executors.make_jobs(args.symbols, args.start, args.end, args.category)
+    for result in executors.run_jobs(jobs, backend=args.backend, max_workers=args.workers,
+                                     progress_callback=print_progress):
+        print(result)
+
+
+def run_kline_progress(args):
+    data = load_module("First & Third", "data")
+    progress = load_module("First & Third", "progress")
+    app = data.get_celery_app()
+    while True:
+        print(progress.format_progress(*progress.collect_progress(app)))
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+        print()
+
+
+def run_panel(args):
+    panel = load_module("First & Third", "panel")
+    csv_files = args.csv_files[0] if len(args.csv_files) == 1 else args.csv_files
+    if panel.build_panel(csv_files, args.output, interval=args.interval, start=args.start, end=args.end,
+                         dtype=args.dtype) is None:
+        sys.exit(1)
+
+
+def run_options(args):
+    if bool(args.symbol) == bool(args.index):
+        sys.exit("Pass exactly one of --symbol or --index")
+
+    command = ["scrapy", "crawl", "nse_spider", "-a", f"date={args.date}", "-o", os.path.abspath(args.output)]
+    command += ["-a", f"symbol={args.symbol}"] if args.symbol else ["-a", f"options={args.index}"]
+    # The spider reads cookies.json from the working directory, so the output path is made absolute first
+    sys.exit(subprocess.call(command, cwd=os.path.join(ROOT, "Sec", "nse_options")))
+
+
+def run_dividend(args):
+    isins = args.isin_file or args.isins
+    if not isins:
+        sys.exit("Pass ISINs or --isin-file")
+
+    if args.store:
+        dividend_store = load_module("Fourth", "dividend_store")
+        store = dividend_store.DividendStore(args.store)
+        store.refresh(isins, max_workers=args.workers, force=args.force)
+        store.get_dividends(isins).to_csv(args.output)
+        print(f"Dividend data saved to '{args.output}'")
+        store.close()
+    else:
+        get_dividend = load_module("Fourth", "get_dividend")
+        results = get_dividend.fetch_bulk_dividends(isins, max_workers=args.workers)
+        get_dividend.process_bulk_dividend_data(results, args.output)
+
+
+def keep_alive(client):
+    try:
+        # Keep the main thread running
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        client.close()
+
+
+def run_orderbook(args):
+    url = f"wss://stream.bybit.com/v5/public/{args.category}"
+    if args.record:
+        if args.depth == 1:
+            sys.exit("--record needs a deeper book than --depth 1 (default 50)")
+        depth_store = load_module("Fifth", "bybit_depth_store")
+        try:
+            client = depth_store.BybitDepthRecorder(url, args.symbols, args.record, depth=args.depth or 50,
+                                                    bucket_ms=args.bucket_ms, band_bps=args.band_bps,
+                                                    n_bands=args.bands)
+        except ValueError as e:
+            sys.exit(str(e))
+    else:
+        ws = load_module("Fifth", "bybit_orderbook_ws")
+        client = ws.BybitWebSocket(url, [f"orderbook.{args.depth or 1}.{symbol}" for symbol in args.symbols])
+    client.connect()
+    keep_alive(client)
+
+
+def run_candles(args):
+    kline_ws = load_module("Fifth", "bybit_kline_ws")
+    client = kline_ws.BybitKlineWebSocket(args.symbols, intervals=args.interval, category=args.category,
+                                          source=args.source, output_dir=args.output_dir)
+    client.connect()
+    keep_alive(client)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Trading data tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    kline = commands.add_parser("kline", help="Download 15m Bybit klines with VWAP/MACD to CSV")
+    kline.add_argument("symbols", nargs="+")
+    kline.add_argument("--category", default="inverse", choices=["spot", "linear", "inverse"])
+    kline.add_argument("--start", required=True, help='e.g. "2024-12-01 00:00" (IST)')
+    kline.add_argument("--end", required=True, help='e.g. "2024-12-31 23:45" (IST)')
+    kline.add_argument("--backend", default="process", choices=["process", "thread", "local", "celery"],
+                       help="local process/thread pool, in this process, or dispatch to Celery workers")
+    kline.add_argument("--workers", type=int, help="pool size for the process/thread backends")
+    kline.set_defaults(func=run_kline)
+
+    kline_progress = commands.add_parser("kline-progress", help="Aggregate progress of running Celery kline tasks")
+    kline_progress.add_argument("--watch", type=float, help="refresh every N seconds")
+    kline_progress.set_defaults(func=run_kline_progress)
+
+    panel = commands.add_parser("panel", help="Align kline CSVs into a memory-mappable time x symbol x field panel")
+    panel.add_argument("csv_files", nargs="+", help="kline CSV paths or a quoted glob pattern")
+    panel.add_argument("-o", "--output", required=True, help="output directory")
+    panel.add_argument("--interval", default="15")
+    panel.add_argument("--start", help='e.g. "2023-01-01 00:00" (IST)')
+    panel.add_argument("--end", help='e.g. "2024-12-31 23:45" (IST)')
+    panel.add_argument("--dtype", default="float64", choices=["float64", "float32"])
+    panel.set_defaults(func=run_panel)
+
+    options = commands.add_parser("options", help="Scrape an NSE option chain with the Scrapy spider")
+    options.add_argument("--symbol", help="equity symbol, e.g. RELIANCE")
+    options.add_argument("--index", help="index symbol, e.g. NIFTY")
+    options.add_argument("--date", required=True, help="expiry date, e.g. 2025-05-29")
+    options.add_argument("-o", "--output", required=True, help="output .csv or .json file")
+    options.set_defaults(func=run_options)
+
+    dividend = commands.add_parser("dividend", help="Fetch Börse Frankfurt dividend history for ISINs")
+    dividend.add_argument("isins", nargs="*")
+    dividend.add_argument("--isin-file", help="file with one ISIN per line")
+    dividend.add_argument("-o", "--output", default="dividend_data_bulk.csv")
+    dividend.add_argument("--workers", type=int, default=16)
+    dividend.add_argument("--store", help="incremental SQLite store; only stale ISINs are fetched")
+    dividend.add_argument("--force", action="store_true", help="refresh every ISIN in the store")
+    dividend.set_defaults(func=run_dividend)
+
+    orderbook = commands.add_parser("orderbook", help="Stream a live Bybit order book")
+    orderbook.add_argument("symbols", nargs="+")
+    orderbook.add_argument("--category", default="spot", choices=["spot", "linear", "inverse"])
+    orderbook.add_argument("--depth", type=int, choices=[1, 50, 200, 500], help="default 1, or 50 with --record")
+    orderbook.add_argument("--record", metavar="DIR", help="record a depth heatmap store instead of logging updates")
+    orderbook.add_argument("--bucket-ms", type=int, default=1000, help="heatmap time bucket; must divide a day evenly")
+    orderbook.add_argument("--band-bps", type=float, default=1.0, help="heatmap price band width around mid")
+    orderbook.add_argument("--bands", type=int, default=50, help="heatmap bands per side")
+    orderbook.set_defaults(func=run_orderbook)
+
+    candles = commands.add_parser("candles", help="Stream closed Bybit candles to CSV")
+    candles.add_argument("symbols", nargs="+")
+    candles.add_argument("--interval", nargs="+", default=["15"])
+    candles.add_argument("--category", default="spot", choices=["spot", "linear", "inverse"])
+    candles.add_argument("--source", default="kline", choices=["kline", "trade"])
+    candles.add_argument("--output-dir", default=".")
+    candles.set_defaults(func=run_candles)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()